@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -5,6 +6,64 @@ class Settings(BaseSettings):
     database_url: str
     openai_api_key: str
 
+    # Database connection pool
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+
+    # Admission control for the grading endpoint
+    grading_max_in_flight: int = 16
+    grading_max_queue: int = 32
+    grading_queue_timeout: float = 2.0
+    grading_max_per_client: int = 4
+    grading_retry_after: int = 5
+    # Comma-separated CIDRs of reverse proxies whose X-Forwarded-For is trusted
+    trusted_proxies: str = ""
+    # Secret for verifying signed X-Client-Id headers (unset: header ignored)
+    client_id_secret: Optional[str] = None
+
+    # Partitioning of the answers table ("time" = monthly ranges, "hash" = by question_id)
+    answers_partition_strategy: str = "time"
+    answers_hash_partitions: int = 8
+    answers_partition_months_ahead: int = 2
+    answers_partition_check_interval: float = 6 * 3600.0
+
+    # Admin-only endpoints and features (disabled when unset)
+    admin_token: Optional[str] = None
+
+    # Per-request profiling (middleware is not installed unless enabled)
+    profiling_enabled: bool = False
+    profile_sample_rate: float = 0.0
+    # Comma-separated "METHOD /path" routes eligible for random sampling
+    profile_sample_routes: str = "POST /answers/"
+    profile_store_size: int = 200
+    profile_top_functions: int = 40
+
+    # Grading LLM call deadline and hedging
+    llm_deadline: float = 30.0
+    llm_deadline_fallback: str = "fast_path"  # "fast_path" or "error"
+    llm_hedge_enabled: bool = False
+    llm_hedge_budget: float = 0.05  # max hedges as a fraction of calls
+    llm_hedge_min_samples: int = 50
+    llm_hedge_min_delay: float = 2.0
+    llm_latency_window: int = 1000
+
+    # Write-behind batching of answer inserts (batch size 1 disables it)
+    answer_write_batch_size: int = 32
+    answer_write_batch_ms: float = 5.0
+
+    # Compiled grading prompt prefixes kept in memory
+    prompt_cache_size: int = 2048
+
+    # Worker warm start and readiness
+    warm_db_connections: int = 5
+    warm_openai_connections: int = 2
+    warm_questions: int = 200
+    question_cache_size: int = 1000
+    warmup_timeout: float = 10.0
+    warmup_retry_interval: float = 15.0
+    ready_timeout: float = 2.0
+    ready_openai_ttl: float = 30.0
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -32,3 +91,6 @@ Scoring:
 - final_score is an overall score from 0 to 100, reflecting the weighted combination.
 """
 
+# Per-category rubrics; categories not listed here use GENERAL_RUBRIC.
+# Changing a rubric's text changes its version, so cached prompts refresh.
+CATEGORY_RUBRICS: Dict[str, str] = {}
@@ -7,7 +7,9 @@ from app.config import settings
 engine = create_async_engine(
     settings.database_url,
     echo=True,
-    future=True
+    future=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
 )
 
 # Create async session factory
@@ -30,11 +32,27 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+def unmanaged_tables():
+    """Tables created by `create_all`; the rest are owned by app.migrations"""
+    return [
+        table for table in Base.metadata.sorted_tables
+        if not table.info.get("managed_by_migrations")
+    ]
+
+
 async def init_db():
-    """Initialize database and enable pgvector extension"""
+    """
+    Initialize database, enable pgvector extension and apply migrations.
+    The extension and simple tables are always ensured (both are no-ops when
+    present); migrations are skipped when the recorded schema version is current.
+    """
+    from app.migrations import LATEST_VERSION, current_version, migrate, ensure_answer_partitions
+
     async with engine.begin() as conn:
         # Enable pgvector extension
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-        # Create all tables
-        await conn.run_sync(Base.metadata.create_all)
-
+        # Create simple tables, then migration-managed ones
+        await conn.run_sync(Base.metadata.create_all, tables=unmanaged_tables())
+        if await current_version(conn) < LATEST_VERSION:
+            await migrate(conn)
+        await ensure_answer_partitions(conn)
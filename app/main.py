@@ -1,8 +1,20 @@
+import asyncio
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.config import settings
 from app.db import init_db
-from app.routers import questions, answers
+from app.migrations import run_partition_maintenance
+from app.routers import questions, answers, profiles
+from app.services.admission import grading_admission
+from app.services.answer_writer import answer_writer
+from app.services.grader import grading_llm
+from app.services.profiling import ProfilingMiddleware
+from app.services.prompts import prompt_cache
+from app.services.question_cache import question_cache
+from app.services.warmup import check_readiness, retry_warm_up, warm_up
 
 app = FastAPI(
     title="AI Answer Grading System",
@@ -19,15 +31,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling; not installed at all when disabled
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(questions.router)
 app.include_router(answers.router)
+app.include_router(profiles.router)
+
+
+# Background task creating upcoming answers partitions
+partition_maintenance = None
+# Background task retrying failed warm-up steps
+warm_up_retry = None
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup"""
+    """Initialize database (DDL only if the schema is out of date) and warm the worker"""
+    global partition_maintenance, warm_up_retry
     await init_db()
+    await answer_writer.start()
+    partition_maintenance = asyncio.create_task(
+        run_partition_maintenance(settings.answers_partition_check_interval)
+    )
+    await warm_up()
+    warm_up_retry = asyncio.create_task(retry_warm_up(settings.warmup_retry_interval))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued answer inserts before exiting"""
+    if partition_maintenance is not None:
+        partition_maintenance.cancel()
+    if warm_up_retry is not None:
+        warm_up_retry.cancel()
+    await answer_writer.stop()
 
 
 @app.get("/")
@@ -41,6 +81,25 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (liveness)"""
     return {"status": "healthy"}
 
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once warmed up and dependencies respond, 503 otherwise"""
+    ready, report = await check_readiness()
+    return JSONResponse(status_code=200 if ready else 503, content=report)
+
+
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime counters for load and capacity monitoring"""
+    return {
+        "admission": grading_admission.stats(),
+        "llm": grading_llm.stats(),
+        "answer_writes": answer_writer.stats(),
+        "prompts": prompt_cache.stats(),
+        "questions": question_cache.stats(),
+    }
@@ -0,0 +1,261 @@
+"""
+Versioned schema migrations.
+
+Tables that need DDL `create_all` cannot express (such as the partitioned
+`answers` table) are created and evolved here. Each migration runs once, in
+order, and is recorded in `schema_migrations`.
+"""
+import asyncio
+from datetime import date
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import settings
+from app.db import engine
+
+# Arbitrary key so that concurrent workers do not migrate at the same time
+MIGRATION_LOCK_KEY = 720_451_001
+
+ANSWER_COLUMNS = """
+    id INTEGER NOT NULL DEFAULT nextval('answers_id_seq'),
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    student_answer TEXT NOT NULL,
+    embedding vector(1536),
+    similarity DOUBLE PRECISION,
+    final_score DOUBLE PRECISION,
+    evaluation JSON,
+    "isCorrect" BOOLEAN,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+"""
+
+
+async def _table_exists(conn: AsyncConnection, name: str) -> bool:
+    result = await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})
+    return result.scalar() is not None
+
+
+async def answers_partition_strategy(conn: AsyncConnection) -> Optional[str]:
+    """Return 'time', 'hash', or None if `answers` is not partitioned"""
+    result = await conn.execute(text("""
+        SELECT partstrat FROM pg_partitioned_table
+        WHERE partrelid = to_regclass('answers')
+    """))
+    strategy = result.scalar()
+    return {"r": "time", "h": "hash"}.get(strategy)
+
+
+def month_partition_name(month: date) -> str:
+    return f"answers_y{month.year:04d}m{month.month:02d}"
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def _months_in_default_partition(conn: AsyncConnection) -> List[date]:
+    """Months that have rows sitting in answers_default (normally none)"""
+    if not await _table_exists(conn, "answers_default"):
+        return []
+    result = await conn.execute(text(
+        "SELECT DISTINCT date_trunc('month', created_at)::date FROM answers_default"
+    ))
+    return [row[0] for row in result]
+
+
+async def _create_month_partition(conn: AsyncConnection, start: date):
+    """
+    Create the partition for one month. Rows for that month that already
+    landed in the default partition are moved into the new table before it is
+    attached; creating it with PARTITION OF would fail on them.
+    """
+    name = month_partition_name(start)
+    end = add_months(start, 1)
+    bounds = {"start": start, "end": end}
+    if await _table_exists(conn, name):
+        return
+
+    stray = False
+    if await _table_exists(conn, "answers_default"):
+        result = await conn.execute(text("""
+            SELECT EXISTS (
+                SELECT 1 FROM answers_default WHERE created_at >= :start AND created_at < :end
+            )
+        """), bounds)
+        stray = result.scalar()
+
+    if not stray:
+        await conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {name}
+            PARTITION OF answers
+            FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')
+        """))
+        return
+
+    print(f"Moving rows for {start:%Y-%m} out of answers_default into {name}")
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE answers INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    # Block concurrent inserts until ATTACH commits, so no row lands in
+    # answers_default after the move and is lost or blocks the attach
+    await conn.execute(text("LOCK TABLE answers_default IN SHARE ROW EXCLUSIVE MODE"))
+    await conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM answers_default
+            WHERE created_at >= :start AND created_at < :end
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), bounds)
+    await conn.execute(text(f"""
+        ALTER TABLE answers ATTACH PARTITION {name}
+        FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')
+    """))
+
+
+async def ensure_answer_partitions(conn: AsyncConnection, today: Optional[date] = None):
+    """
+    Create monthly partitions from the current month up to the configured
+    horizon, plus one for any month whose rows fell into answers_default.
+    """
+    if await answers_partition_strategy(conn) != "time":
+        return
+
+    month = (today or date.today()).replace(day=1)
+    months = [add_months(month, offset) for offset in range(settings.answers_partition_months_ahead + 1)]
+    months = sorted(set(months) | set(await _months_in_default_partition(conn)))
+    missing = [start for start in months if not await _table_exists(conn, month_partition_name(start))]
+    if not missing:
+        # Common case: nothing to create, so no lock and no DDL
+        return
+
+    # Serialize with other workers doing the same
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    for start in missing:
+        await _create_month_partition(conn, start)
+
+
+async def run_partition_maintenance(interval: float):
+    """Keep creating upcoming partitions while the worker runs"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with engine.begin() as conn:
+                await ensure_answer_partitions(conn)
+        except Exception as e:
+            print(f"Partition maintenance failed: {str(e)}")
+
+
+async def _create_partitioned_answers(conn: AsyncConnection):
+    """
+    Create `answers` as a partitioned table.
+
+    An existing plain `answers` table (from the old `create_all` bootstrap) is
+    copied into the new table and dropped. Legacy rows have no creation time
+    and are stamped with the migration time.
+    """
+    strategy = settings.answers_partition_strategy
+    if strategy not in ("time", "hash"):
+        raise ValueError(f"Unknown answers partition strategy: {strategy!r}")
+
+    legacy = await _table_exists(conn, "answers")
+    if legacy:
+        await conn.execute(text("ALTER TABLE answers RENAME TO answers_legacy"))
+        await conn.execute(text("ALTER INDEX IF EXISTS answers_pkey RENAME TO answers_legacy_pkey"))
+        await conn.execute(text("ALTER INDEX IF EXISTS ix_answers_id RENAME TO ix_answers_legacy_id"))
+
+    await conn.execute(text("CREATE SEQUENCE IF NOT EXISTS answers_id_seq"))
+
+    if strategy == "time":
+        await conn.execute(text(f"""
+            CREATE TABLE answers ({ANSWER_COLUMNS},
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """))
+        # Catches rows outside the pre-created monthly range
+        await conn.execute(text("CREATE TABLE answers_default PARTITION OF answers DEFAULT"))
+    else:
+        await conn.execute(text(f"""
+            CREATE TABLE answers ({ANSWER_COLUMNS},
+                PRIMARY KEY (id, question_id)
+            ) PARTITION BY HASH (question_id)
+        """))
+        modulus = settings.answers_hash_partitions
+        for remainder in range(modulus):
+            await conn.execute(text(f"""
+                CREATE TABLE answers_p{remainder} PARTITION OF answers
+                FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder})
+            """))
+
+    await conn.execute(text("ALTER SEQUENCE answers_id_seq OWNED BY answers.id"))
+    await conn.execute(text(
+        "CREATE INDEX ix_answers_question_id_created_at ON answers (question_id, created_at)"
+    ))
+    await ensure_answer_partitions(conn)
+
+    if legacy:
+        await conn.execute(text("""
+            INSERT INTO answers (id, question_id, student_answer, embedding, similarity,
+                                 final_score, evaluation, "isCorrect")
+            SELECT id, question_id, student_answer, embedding, similarity,
+                   final_score, evaluation, "isCorrect"
+            FROM answers_legacy
+        """))
+        await conn.execute(text("DROP TABLE answers_legacy"))
+        await conn.execute(text(
+            "SELECT setval('answers_id_seq', COALESCE((SELECT max(id) FROM answers), 0) + 1, false)"
+        ))
+
+
+async def _add_raw_evaluation(conn: AsyncConnection):
+    """Keep the LLM's pre-penalty scores so answers can be re-scored offline"""
+    await conn.execute(text("ALTER TABLE answers ADD COLUMN IF NOT EXISTS raw_evaluation JSON"))
+
+
+async def _null_raw_evaluation(conn: AsyncConnection):
+    """Earlier writes stored a missing raw evaluation as JSON 'null' instead of SQL NULL"""
+    await conn.execute(text(
+        "UPDATE answers SET raw_evaluation = NULL WHERE json_typeof(raw_evaluation) = 'null'"
+    ))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[AsyncConnection], Awaitable[None]]]] = [
+    (1, "partitioned answers table", _create_partitioned_answers),
+    (2, "answers.raw_evaluation", _add_raw_evaluation),
+    (3, "answers.raw_evaluation JSON null to SQL NULL", _null_raw_evaluation),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def current_version(conn: AsyncConnection) -> int:
+    """Highest applied migration version, or 0 on a fresh database"""
+    if not await _table_exists(conn, "schema_migrations"):
+        return 0
+    result = await conn.execute(text("SELECT COALESCE(max(version), 0) FROM schema_migrations"))
+    return result.scalar()
+
+
+async def migrate(conn: AsyncConnection):
+    """Apply all pending migrations inside the caller's transaction"""
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    await conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+
+    result = await conn.execute(text("SELECT version FROM schema_migrations"))
+    applied = {row[0] for row in result}
+
+    for version, name, apply in MIGRATIONS:
+        if version in applied:
+            continue
+        print(f"Applying migration {version}: {name}")
+        await apply(conn)
+        await conn.execute(
+            text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+            {"version": version, "name": name},
+        )
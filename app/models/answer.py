@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, Float, JSON, Boolean
+from sqlalchemy import Column, Integer, Text, ForeignKey, Float, JSON, Boolean, DateTime, func
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import Vector
 from app.db import Base
@@ -6,6 +6,8 @@ from app.db import Base
 
 class Answer(Base):
     __tablename__ = "answers"
+    # Partitioned table; DDL lives in app.migrations
+    __table_args__ = {"info": {"managed_by_migrations": True}}
 
     id = Column(Integer, primary_key=True, index=True)
     question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
@@ -14,7 +16,11 @@ class Answer(Base):
     similarity = Column(Float, nullable=True)
     final_score = Column(Float, nullable=True)
     evaluation = Column(JSON, nullable=True)
+    # LLM scores before the similarity penalty; NULL when there are none
+    # (auto-fail, unparseable response, deadline fallback)
+    raw_evaluation = Column(JSON(none_as_null=True), nullable=True)
     isCorrect = Column(Boolean, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
     # Relationships
     question = relationship("Question", back_populates="answers")
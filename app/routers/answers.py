@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 from app.db import get_db
 from app.models.answer import Answer
-from app.models.question import Question
 from app.schemas.answer_schemas import AnswerCreate, AnswerResponse
 from app.services.embeddings import generate_embedding
 from app.services.similarity import calculate_cosine_similarity, list_to_array
-from app.services.grader import grade_answer
-from app.config import GENERAL_RUBRIC
+from app.services.grader import evaluate_answer
+from app.services.hedging import DeadlineExceeded
+from app.services.admission import grading_admission, client_key
+from app.services.answer_writer import answer_writer
+from app.services.profiling import span
+from app.services.prompts import resolve_rubric
+from app.services.question_cache import question_cache
 
 router = APIRouter(prefix="/answers", tags=["answers"])
 
@@ -18,14 +25,18 @@ router = APIRouter(prefix="/answers", tags=["answers"])
 @router.post("/", response_model=AnswerResponse, status_code=status.HTTP_201_CREATED)
 async def submit_answer(
     answer_data: AnswerCreate,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
 ):
     """Submit a student answer and trigger grading"""
-    # Get question
-    question_result = await db.execute(
-        select(Question).where(Question.id == answer_data.question_id)
-    )
-    question = question_result.scalar_one_or_none()
+    async with grading_admission.slot(client_key(request)):
+        return await _grade_and_store(answer_data)
+
+
+async def _grade_and_store(answer_data: AnswerCreate) -> Dict[str, Any]:
+    # No DB session is held while waiting on OpenAI: the question comes from
+    # the per-worker cache (short version-check session) and the insert is batched.
+    with span("load_question"):
+        question = await question_cache.get(answer_data.question_id)
 
     if not question:
         raise HTTPException(
@@ -40,59 +51,89 @@ async def submit_answer(
             detail="Question reference answer embedding not found",
         )
 
-    # Use general rubric for all questions
-    rubric_text = GENERAL_RUBRIC
+    # Category rubric if configured, otherwise the general rubric
+    rubric_text = resolve_rubric(question.category)
 
     # Generate embedding for student answer
-    student_embedding = await generate_embedding(answer_data.student_answer)
+    with span("embedding"):
+        student_embedding = await generate_embedding(answer_data.student_answer)
 
     # Calculate cosine similarity
-    # Convert embedding to list if needed (pgvector returns list-like object)
-    ref_embedding_list = list(question.embedding) if question.embedding is not None else []
-    if not ref_embedding_list:
+    # The cached reference embedding is already a NumPy array
+    if question.embedding.size == 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Question embedding is empty",
         )
-    ref_embedding_array = list_to_array(ref_embedding_list)
-    student_embedding_array = list_to_array(student_embedding)
-    similarity = calculate_cosine_similarity(ref_embedding_array, student_embedding_array)
+    with span("similarity"):
+        student_embedding_array = list_to_array(student_embedding)
+        similarity = calculate_cosine_similarity(question.embedding, student_embedding_array)
 
     # Grade the answer
-    evaluation = await grade_answer(
-        similarity=similarity,
-        rubric=rubric_text,
-        question=question.text,
-        ref_answer=question.reference_answer,
-        student_answer=answer_data.student_answer,
-    )
+    with span("grade"):
+        try:
+            evaluation, raw_evaluation = await evaluate_answer(
+                similarity=similarity,
+                rubric=rubric_text,
+                question=question.text,
+                ref_answer=question.reference_answer,
+                student_answer=answer_data.student_answer,
+                question_id=question.id,
+                question_version=question.version,
+            )
+        except DeadlineExceeded:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Grading timed out",
+            )
 
     # Create answer record
-    answer = Answer(
+    answer = dict(
         question_id=answer_data.question_id,
         student_answer=answer_data.student_answer,
         embedding=student_embedding,
         similarity=similarity,
         final_score=evaluation.get("final_score", 0),
         evaluation=evaluation,
+        raw_evaluation=raw_evaluation,
     )
 
-    db.add(answer)
-    await db.commit()
-    await db.refresh(answer)
+    # Batched with concurrent submissions; returns once committed
+    with span("store"):
+        try:
+            generated = await answer_writer.insert(answer)
+        except IntegrityError:
+            # Question deleted while this answer was being graded
+            question_cache.invalidate(answer_data.question_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Question not found",
+            )
 
-    return answer
+    return {**answer, **generated}
 
 
 @router.get("/question/{question_id}", response_model=List[AnswerResponse])
 async def list_answers_for_question(
     question_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """List all answers for a question"""
-    result = await db.execute(
-        select(Answer).where(Answer.question_id == question_id)
+    """List answers for a question, optionally within a submission time window"""
+    # Filtering on question_id / created_at lets Postgres prune partitions;
+    # embeddings are not part of the response so they are never loaded.
+    query = (
+        select(Answer)
+        .options(defer(Answer.embedding))
+        .where(Answer.question_id == question_id)
+        .order_by(Answer.created_at, Answer.id)
     )
+    if since is not None:
+        query = query.where(Answer.created_at >= since)
+    if until is not None:
+        query = query.where(Answer.created_at < until)
+
+    result = await db.execute(query)
     answers = result.scalars().all()
     return answers
-
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from typing import Any, Dict, List, Optional
+
+from app.services.profiling import is_admin_token, profile_store
+
+router = APIRouter(prefix="/profiles", tags=["profiles"])
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Allow only callers presenting the configured admin token"""
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required",
+        )
+
+
+@router.get("/", response_model=List[Dict[str, Any]], dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """List stored request profiles, newest first"""
+    return [profile.summary() for profile in profile_store.list()]
+
+
+@router.get("/{profile_id}", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str):
+    """Get a stored request profile with its spans and cProfile output"""
+    profile = profile_store.get(profile_id)
+
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+
+    return profile.to_dict()
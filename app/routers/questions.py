@@ -6,6 +6,7 @@ from app.db import get_db
 from app.models.question import Question
 from app.schemas.question_schemas import QuestionCreate, QuestionResponse
 from app.services.embeddings import generate_embedding
+from app.services.question_cache import question_cache
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
@@ -94,6 +95,7 @@ async def update_question(
     
     await db.commit()
     await db.refresh(question)
+    question_cache.invalidate(question_id)
     
     return question
 
@@ -117,6 +119,7 @@ async def delete_question(
     
     await db.delete(question)
     await db.commit()
+    question_cache.invalidate(question_id)
     
     return None
 
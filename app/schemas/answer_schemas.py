@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 
@@ -24,6 +25,7 @@ class AnswerResponse(BaseModel):
     similarity: Optional[float] = None
     final_score: Optional[float] = None
     evaluation: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
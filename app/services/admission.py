@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import hmac
+from collections import deque
+from contextlib import asynccontextmanager
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+from typing import Deque, Dict, Any, List, Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+
+
+class AdmissionController:
+    """
+    Bounded admission for expensive endpoints.
+
+    At most `max_in_flight` requests run at once. Up to `max_queue` more may
+    wait (FIFO) for at most `queue_timeout` seconds. Each client may hold at
+    most `max_per_client` running or queued slots, so one noisy client cannot
+    fill the queue. Anything beyond that is shed immediately with a 503.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        max_per_client: int,
+        retry_after: int,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_per_client = max_per_client
+        self.retry_after = retry_after
+
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._per_client: Dict[str, int] = {}
+
+        self.admitted = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0, "client_limit": 0}
+
+    def _shed(self, reason: str):
+        self.shed[reason] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Grading is at capacity, please retry shortly",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def _acquire(self):
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Caller went away; give the slot back if it was already handed over
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            else:
+                self._discard_waiter(waiter)
+            raise
+
+        if not waiter.done():
+            self._discard_waiter(waiter)
+            self._shed("queue_timeout")
+
+    def _discard_waiter(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        waiter.cancel()
+
+    def _release_slot(self):
+        # Hand the slot straight to the next waiter so in-flight never dips
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, client: str):
+        """Hold one admission slot for the duration of the block"""
+        if self._per_client.get(client, 0) >= self.max_per_client:
+            self._shed("client_limit")
+
+        self._per_client[client] = self._per_client.get(client, 0) + 1
+        try:
+            await self._acquire()
+        except BaseException:
+            self._forget_client(client)
+            raise
+
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self._release_slot()
+            self._forget_client(client)
+
+    def _forget_client(self, client: str):
+        remaining = self._per_client.get(client, 0) - 1
+        if remaining > 0:
+            self._per_client[client] = remaining
+        else:
+            self._per_client.pop(client, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "active_clients": len(self._per_client),
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+        }
+
+
+def _parse_networks(value: str) -> List[IPv4Network | IPv6Network]:
+    return [ip_network(part.strip(), strict=False) for part in value.split(",") if part.strip()]
+
+
+_trusted_proxies = _parse_networks(settings.trusted_proxies)
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def _forwarded_client(request: Request) -> str:
+    """
+    Remote address of the caller. X-Forwarded-For is only honoured when the
+    direct peer is a trusted proxy; hops added by trusted proxies are skipped
+    from the right, so a client cannot spoof its address by prepending entries.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+def _signed_client_id(request: Request) -> Optional[str]:
+    """
+    Client identity issued by an authenticated frontend: X-Client-Id plus
+    X-Client-Signature = hex HMAC-SHA256(client_id_secret, client id).
+    Unsigned or wrongly signed ids are ignored.
+    """
+    if not settings.client_id_secret:
+        return None
+    client_id = request.headers.get("x-client-id")
+    signature = request.headers.get("x-client-signature")
+    if not client_id or not signature:
+        return None
+    expected = hmac.new(
+        settings.client_id_secret.encode(), client_id.encode(), hashlib.sha256
+    ).hexdigest()
+    return client_id if hmac.compare_digest(signature, expected) else None
+
+
+def client_key(request: Request) -> str:
+    """Identify the caller for per-client fairness"""
+    client_id = _signed_client_id(request)
+    if client_id:
+        return f"id:{client_id}"
+    return f"ip:{_forwarded_client(request)}"
+
+
+grading_admission = AdmissionController(
+    max_in_flight=settings.grading_max_in_flight,
+    max_queue=settings.grading_max_queue,
+    queue_timeout=settings.grading_queue_timeout,
+    max_per_client=settings.grading_max_per_client,
+    retry_after=settings.grading_retry_after,
+)
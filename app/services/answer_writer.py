@@ -0,0 +1,153 @@
+"""
+Write-behind batching for answer inserts.
+
+Concurrent `insert()` calls are gathered into micro-batches of up to
+`max_batch` rows or `max_wait_ms` milliseconds, whichever comes first, and
+each batch is written with a single multi-row INSERT ... RETURNING in one
+transaction.
+
+Durability: `insert()` returns only after the batch's transaction has
+committed, so an acknowledged answer is as durable as with a per-request
+commit. Rows still waiting in the queue when the process dies were never
+acknowledged; their requests fail. A request that is cancelled while waiting
+may still have its row committed. If a batch fails, its rows are retried one
+by one so a single bad row only fails its own request.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from app.config import settings
+from app.db import engine
+from app.models.answer import Answer
+
+answers_table = Answer.__table__
+
+
+class AnswerBatchWriter:
+    def __init__(self, max_batch: int, max_wait_ms: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "asyncio.Queue[Tuple[Dict[str, Any], asyncio.Future]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.rows = 0
+        self.failed_batches = 0
+        self.failed_rows = 0
+        self.largest_batch = 0
+        self.flush_seconds = 0.0
+        self._started_at: Optional[float] = None
+
+    async def start(self):
+        if self._task is None and self.max_batch > 1:
+            self._started_at = time.perf_counter()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything already queued, then stop the background task"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def insert(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert one answer; returns the generated columns (id, created_at) once committed"""
+        if self._task is None:
+            # Batching disabled or not started (scripts): write directly
+            return (await self._write([values]))[0]
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((values, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        try:
+            rows = await self._write([values for values, _ in batch])
+        except Exception:
+            self.failed_batches += 1
+            # Isolate the failing row(s)
+            for values, future in batch:
+                try:
+                    row = (await self._write([values]))[0]
+                except Exception as e:
+                    self.failed_rows += 1
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(row)
+            return
+
+        for (_, future), row in zip(batch, rows):
+            if not future.done():
+                future.set_result(row)
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        # executemany + RETURNING is sent as one multi-row INSERT; the
+        # parameter-order flag guarantees RETURNING rows line up with `rows`
+        stmt = insert(answers_table).returning(
+            answers_table.c.id,
+            answers_table.c.created_at,
+            sort_by_parameter_order=True,
+        )
+        async with engine.begin() as conn:
+            result = await conn.execute(stmt, rows)
+            returned = [dict(row._mapping) for row in result]
+
+        self.flush_seconds += time.perf_counter() - started
+        self.batches += 1
+        self.rows += len(rows)
+        self.largest_batch = max(self.largest_batch, len(rows))
+        return returned
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = time.perf_counter() - self._started_at if self._started_at else None
+        return {
+            "enabled": self._task is not None,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch_size": round(self.rows / self.batches, 2) if self.batches else None,
+            "largest_batch": self.largest_batch,
+            "avg_flush_ms": round(self.flush_seconds / self.batches * 1000, 2) if self.batches else None,
+            "rows_per_flush_second": round(self.rows / self.flush_seconds, 1) if self.flush_seconds else None,
+            "rows_per_second": round(self.rows / uptime, 2) if uptime else None,
+            "failed_batches": self.failed_batches,
+            "failed_rows": self.failed_rows,
+        }
+
+
+answer_writer = AnswerBatchWriter(
+    max_batch=settings.answer_write_batch_size,
+    max_wait_ms=settings.answer_write_batch_ms,
+)
@@ -1,105 +1,183 @@
 import json
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
 from openai import AsyncOpenAI
 from app.config import settings
+from app.services.profiling import span
+from app.services.hedging import DeadlineExceeded, HedgedCaller
+from app.services.prompts import build_messages, prompt_cache
 
 client = AsyncOpenAI(api_key=settings.openai_api_key)
 
+grading_llm = HedgedCaller(
+    deadline=settings.llm_deadline,
+    hedge_enabled=settings.llm_hedge_enabled,
+    hedge_budget=settings.llm_hedge_budget,
+    hedge_min_samples=settings.llm_hedge_min_samples,
+    hedge_min_delay=settings.llm_hedge_min_delay,
+    window_size=settings.llm_latency_window,
+)
+
 MAX_PENALTY = 40
 
+CRITERIA = ["understanding", "key_points", "structure", "accuracy"]
+SCORE_KEYS = CRITERIA + ["final_score"]
+
+AUTO_FAIL_RESULT = {
+    "understanding": 0,
+    "key_points": 0,
+    "structure": 5,
+    "accuracy": 0,
+    "final_score": 5,
+    "feedback": "Answer is unrelated.",
+    "isCorrect": False
+}
+
+
+@dataclass(frozen=True)
+class PenaltyPolicy:
+    """
+    How similarity turns a raw LLM evaluation into the stored grade.
+
+    Below `fail_below` the answer auto-fails without an LLM call. Between
+    `fail_below` and `full_credit_from` the final score loses up to
+    `max_penalty` points (linearly), and each criterion is scaled down by
+    `criteria_factor` times the relative final-score penalty.
+    """
+    max_penalty: float = MAX_PENALTY
+    fail_below: float = 0.30
+    full_credit_from: float = 0.60
+    criteria_factor: float = 0.5
+
+
+DEFAULT_POLICY = PenaltyPolicy()
 
-def calculate_penalty(similarity: float) -> float:
+
+def calculate_penalty(similarity: float, policy: PenaltyPolicy = DEFAULT_POLICY) -> float:
     """
     Calculate penalty based on similarity score.
     Formula: ((0.60 - similarity) / 0.30) * MAX_PENALTY
     Only applies when 0.30 <= similarity < 0.60
+    (thresholds and MAX_PENALTY are the DEFAULT_POLICY values)
     """
-    if similarity < 0.30 or similarity >= 0.60:
+    if similarity < policy.fail_below or similarity >= policy.full_credit_from:
         return 0.0
     
-    penalty = ((0.60 - similarity) / 0.30) * MAX_PENALTY
+    band = policy.full_credit_from - policy.fail_below
+    penalty = ((policy.full_credit_from - similarity) / band) * policy.max_penalty
     return penalty
 
 
-async def grade_answer(
+def apply_penalty_policy(
+    raw: Dict[str, Any],
+    similarity: float,
+    policy: PenaltyPolicy = DEFAULT_POLICY
+) -> Dict[str, Any]:
+    """
+    Turn a raw (pre-penalty) LLM evaluation into the final evaluation.
+    Mirrored in vectorized form by app.services.rescoring.rescore.
+    """
+    if similarity < policy.fail_below:
+        return dict(AUTO_FAIL_RESULT)
+
+    result = dict(raw)
+
+    # Case 2: Apply penalty for moderate similarity
+    if similarity < policy.full_credit_from:
+        penalty = calculate_penalty(similarity, policy)
+        original_score = result.get("final_score", 0)
+        result["final_score"] = max(0, original_score - penalty)
+        
+        # Also adjust individual criteria proportionally
+        if original_score > 0:
+            penalty_ratio = penalty / original_score
+            for key in CRITERIA:
+                if key in result:
+                    result[key] = max(0, int(result[key] * (1 - penalty_ratio * policy.criteria_factor)))
+    
+    # Clamp final score between 0 and 100
+    result["final_score"] = max(0, min(100, int(result.get("final_score", 0))))
+    
+    # Ensure all scores are integers
+    for key in SCORE_KEYS:
+        if key in result:
+            result[key] = int(result[key])
+    
+    return result
+
+
+def fast_path_grade() -> Dict[str, Any]:
+    """
+    Placeholder evaluation used when the LLM call misses its deadline. No
+    score is given and the answer is neither correct nor incorrect until
+    scripts/regrade_pending.py replaces it with a full evaluation; similarity
+    alone is not trusted to award credit.
+    """
+    return {
+        "understanding": None,
+        "key_points": None,
+        "structure": None,
+        "accuracy": None,
+        "final_score": None,
+        "feedback": "Grading is delayed; a detailed evaluation will follow.",
+        "isCorrect": None,
+        "status": "pending",
+        "degraded": True,
+        "pending_regrade": True
+    }
+
+
+def _has_content(response) -> bool:
+    return bool(response.choices) and bool(response.choices[0].message.content)
+
+
+async def evaluate_answer(
     similarity: float,
     rubric: str,
     question: str,
     ref_answer: str,
-    student_answer: str
-) -> Dict[str, Any]:
+    student_answer: str,
+    policy: PenaltyPolicy = DEFAULT_POLICY,
+    question_id: Optional[int] = None,
+    question_version: Optional[str] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
     """
-    Grade student answer using LLM with penalty logic based on similarity.
-    
-    Case 1: similarity < 0.30 -> Auto-fail
-    Case 2: 0.30 <= similarity < 0.60 -> Apply penalty
-    Case 3: similarity >= 0.60 -> Normal grading
+    Grade student answer and return (evaluation, raw_evaluation).
+
+    raw_evaluation is the LLM's own scoring before any similarity penalty, so
+    stored answers can be re-scored under a different policy without new LLM
+    calls. It is None when the answer auto-failed and no LLM call was made,
+    when the LLM response could not be parsed, or when the LLM missed its
+    deadline and the fast-path grade was used.
+    Raises DeadlineExceeded instead when `llm_deadline_fallback` is "error".
     """
     # Case 1: Auto-fail for very low similarity
-    if similarity < 0.30:
-        return {
-            "understanding": 0,
-            "key_points": 0,
-            "structure": 5,
-            "accuracy": 0,
-            "final_score": 5,
-            "feedback": "Answer is unrelated.",
-            "isCorrect": False
-        }
+    if similarity < policy.fail_below:
+        return dict(AUTO_FAIL_RESULT), None
     
-    # Calculate confidence score for prompt
-    confidence_score = min(similarity * 100, 100)
-    
-    # Build prompt template
-    prompt = f"""You are an experienced examiner. You will grade a student's answer using the rubric AND the similarity score.
-
-Similarity Score: {similarity:.2f}
-Confidence Score: {confidence_score:.2f}
-
-Rules:
-- If similarity < 0.50 → heavily penalize understanding and key points
-- If similarity 0.50–0.70 → apply moderate penalty
-- If similarity > 0.70 → grade normally
-- Do NOT reward unrelated or incorrect answers
-
-Rubric:
-{rubric}
-
-Question:
-{question}
-
-Reference Answer:
-{ref_answer}
-
-Student Answer:
-{student_answer}
-
-Return a JSON object ONLY:
-{{
-  "understanding": number,
-  "key_points": number,
-  "structure": number,
-  "accuracy": number,
-  "final_score": number,
-  "feedback": "string",
-  "isCorrect": boolean
-}}
-
-IMPORTANT: The "isCorrect" field must be included and should reflect whether the answer is factually/conceptually correct based on your evaluation, regardless of the final_score. For example:
-- If the answer is numerically or factually correct but lacks explanation/format, set isCorrect: true
-- If the answer is wrong or unrelated, set isCorrect: false
-- Base isCorrect on the correctness of the answer itself, not on the scoring criteria like structure or completeness
-"""
+    # Static prefix is compiled once per question row version and rubric;
+    # per-answer fields go last so the provider can cache the prefix
+    prefix = prompt_cache.prefix(question_id, question_version, rubric, question, ref_answer)
+    messages = build_messages(prefix, similarity, student_answer)
 
     # Call OpenAI GPT-4
-    response = await client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are an expert grader. Always return valid JSON only."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.3
-    )
+    try:
+        with span("llm_call"):
+            response = await grading_llm.call(
+                lambda: client.chat.completions.create(
+                    model="gpt-4",
+                    messages=messages,
+                    temperature=0.3,
+                    timeout=settings.llm_deadline
+                ),
+                is_valid=_has_content,
+            )
+    except DeadlineExceeded:
+        if settings.llm_deadline_fallback != "fast_path":
+            raise
+        return fast_path_grade(), None
+    
+    prompt_cache.record_usage(response.usage)
     
     # Parse JSON response
     content = response.choices[0].message.content.strip()
@@ -113,10 +191,12 @@ IMPORTANT: The "isCorrect" field must be included and should reflect whether the
         content = content[:-3]
     content = content.strip()
     
+    parsed = True
     try:
         result = json.loads(content)
     except json.JSONDecodeError:
-        # Fallback if JSON parsing fails
+        # Fallback if JSON parsing fails; not a real LLM score, so no raw evaluation
+        parsed = False
         result = {
             "understanding": 0,
             "key_points": 0,
@@ -127,27 +207,6 @@ IMPORTANT: The "isCorrect" field must be included and should reflect whether the
             "isCorrect": False
         }
     
-    # Case 2: Apply penalty for moderate similarity
-    if 0.30 <= similarity < 0.60:
-        penalty = calculate_penalty(similarity)
-        original_score = result.get("final_score", 0)
-        result["final_score"] = max(0, original_score - penalty)
-        
-        # Also adjust individual criteria proportionally
-        if original_score > 0:
-            penalty_ratio = penalty / original_score
-            for key in ["understanding", "key_points", "structure", "accuracy"]:
-                if key in result:
-                    result[key] = max(0, int(result[key] * (1 - penalty_ratio * 0.5)))
-    
-    # Clamp final score between 0 and 100
-    result["final_score"] = max(0, min(100, int(result.get("final_score", 0))))
-    
-    # Ensure all scores are integers
-    for key in ["understanding", "key_points", "structure", "accuracy", "final_score"]:
-        if key in result:
-            result[key] = int(result[key])
-    
     # Ensure isCorrect is a boolean - LLM must generate it based on its evaluation
     # If LLM didn't provide it, we need to re-request or use a default
     if "isCorrect" not in result:
@@ -164,4 +223,5 @@ IMPORTANT: The "isCorrect" field must be included and should reflect whether the
             # For boolean or numeric values, use bool() conversion
             result["isCorrect"] = bool(is_correct_value)
     
-    return result
+    return apply_penalty_policy(result, similarity, policy), result if parsed else None
+
@@ -0,0 +1,187 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """No valid result was produced before the call's deadline"""
+
+
+class LatencyWindow:
+    """Sliding window of recent latencies (seconds)"""
+
+    def __init__(self, size: int):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        return float(np.percentile(np.fromiter(self._samples, dtype=np.float64), q))
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            f"p{q}_ms": None if (value := self.percentile(q)) is None else round(value * 1000, 1)
+            for q in (50, 95, 99)
+        }
+
+
+class HedgedCaller:
+    """
+    Runs an async call with a hard deadline and optional request hedging.
+
+    When hedging is enabled and enough latency samples exist, a duplicate
+    attempt is started once the first one has been running longer than the
+    observed p95. The first valid result wins and the other attempt is
+    cancelled. Hedges are capped at `hedge_budget` (a fraction of calls) so a
+    slow provider is not hit with double traffic.
+    """
+
+    def __init__(
+        self,
+        deadline: float,
+        hedge_enabled: bool,
+        hedge_budget: float,
+        hedge_min_samples: int,
+        hedge_min_delay: float,
+        window_size: int,
+    ):
+        self.deadline = deadline
+        self.hedge_enabled = hedge_enabled
+        self.hedge_budget = hedge_budget
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+
+        # Duration of individual attempts, or time run before being cancelled;
+        # drives the hedge delay
+        self.attempt_latency = LatencyWindow(window_size)
+        # Time until the caller got a result, capped at the deadline on timeout
+        self.observed_latency = LatencyWindow(window_size)
+        # Time the first attempt took, or had taken when it was cancelled
+        # (a lower bound on latency without hedging)
+        self.unhedged_latency = LatencyWindow(window_size)
+
+        self.calls = 0
+        self.hedges_issued = 0
+        self.hedge_wins = 0
+        self.hedges_skipped_budget = 0
+        self.deadline_exceeded = 0
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_enabled or len(self.attempt_latency) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.attempt_latency.percentile(95))
+
+    def _may_hedge(self) -> bool:
+        if self.hedges_issued + 1 > self.hedge_budget * self.calls:
+            self.hedges_skipped_budget += 1
+            return False
+        return True
+
+    async def call(
+        self,
+        make_call: Callable[[], Awaitable[T]],
+        is_valid: Callable[[T], bool] = lambda result: True,
+        deadline: Optional[float] = None,
+    ) -> T:
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline_at = start + (deadline or self.deadline)
+        hedge_delay = self._hedge_delay()
+        hedge_at = start + hedge_delay if hedge_delay is not None else None
+
+        started: Dict[asyncio.Task, float] = {}
+
+        def launch():
+            task = asyncio.ensure_future(make_call())
+            started[task] = loop.time()
+            return task
+
+        primary = launch()
+        pending = {primary}
+        hedged = False
+        timed_out = False
+        last_result: Any = None
+        last_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                now = loop.time()
+                next_event = deadline_at if hedged or hedge_at is None else min(hedge_at, deadline_at)
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, next_event - now), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    self.attempt_latency.add(loop.time() - started[task])
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    result = task.result()
+                    if not is_valid(result):
+                        last_result = result
+                        continue
+
+                    finished = loop.time()
+                    self.observed_latency.add(finished - start)
+                    if task is primary:
+                        self.unhedged_latency.add(finished - start)
+                    else:
+                        self.hedge_wins += 1
+                        self.unhedged_latency.add(finished - started[primary])
+                    return result
+
+                now = loop.time()
+                if now >= deadline_at:
+                    timed_out = True
+                    break
+                if pending and not hedged and hedge_at is not None and now >= hedge_at:
+                    hedged = True
+                    if self._may_hedge():
+                        self.hedges_issued += 1
+                        pending.add(launch())
+        finally:
+            cancelled_at = loop.time()
+            for task in started:
+                if not task.done():
+                    task.cancel()
+                    # Lower bound on how long this attempt would have taken
+                    self.attempt_latency.add(cancelled_at - started[task])
+
+        if timed_out:
+            self.deadline_exceeded += 1
+            # Slow calls must show up in the percentiles, not vanish from them
+            ended = min(cancelled_at, deadline_at)
+            self.observed_latency.add(ended - start)
+            self.unhedged_latency.add(ended - started[primary])
+            raise DeadlineExceeded(f"No result within {deadline_at - start:.2f}s")
+
+        # Every attempt finished without a valid result
+        self.observed_latency.add(loop.time() - start)
+        if last_result is not None:
+            return last_result
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "deadline_s": self.deadline,
+            "deadline_exceeded": self.deadline_exceeded,
+            "hedging_enabled": self.hedge_enabled,
+            "hedge_delay_ms": None if (delay := self._hedge_delay()) is None else round(delay * 1000, 1),
+            "hedges_issued": self.hedges_issued,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped_budget": self.hedges_skipped_budget,
+            "latency": self.observed_latency.summary(),
+            "unhedged_latency_lower_bound": self.unhedged_latency.summary(),
+        }
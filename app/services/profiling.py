@@ -0,0 +1,216 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when an admin sends `X-Profile: trace|cprofile` (with a
+valid `X-Admin-Token`), or when a request to one of `profile_sample_routes`
+is picked by `profile_sample_rate`. Only admin-requested profiles expose their
+id in the response. Two kinds of capture are available:
+
+- trace: wall-clock timings of the `span()` blocks the request passes
+  through (DB calls, embedding, LLM call, ...). Cheap enough to sample.
+- cprofile: a full cProfile of the event loop thread for the duration of the
+  request, plus the trace. Other requests running concurrently on the same
+  loop show up in it too, so use it on a quiet worker.
+
+The middleware is only installed when `profiling_enabled` is set, and
+`span()` is a single context-variable lookup when no profile is active.
+"""
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+_NO_SPAN = nullcontext()
+_cprofile_active = False
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, mode: str, trigger: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.mode = mode
+        self.trigger = trigger
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.spans: List[Dict[str, Any]] = []
+        self._depth = 0
+        self.cprofile: Optional[str] = None
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        depth = self._depth
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth = depth
+            end = time.perf_counter()
+            self.spans.append({
+                "name": name,
+                "depth": depth,
+                "start_ms": round((start - self._start) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+            })
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "mode": self.mode,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "status_code": self.status_code,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        spanned = sum(span["duration_ms"] for span in self.spans if span["depth"] == 0)
+        return {
+            **self.summary(),
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+            # Time not covered by any span: validation, routing, serialization
+            "unaccounted_ms": round((self.duration_ms or 0) - spanned, 3),
+            "cprofile": self.cprofile,
+        }
+
+
+def span(name: str):
+    """Time a block in the current request's profile; a no-op when not profiling"""
+    profile = _current_profile.get()
+    if profile is None:
+        return _NO_SPAN
+    return profile.span(name)
+
+
+class ProfileStore:
+    """Keeps the most recent profiles in memory"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+
+    def add(self, profile: RequestProfile):
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[RequestProfile]:
+        return list(reversed(self._profiles.values()))
+
+
+profile_store = ProfileStore(settings.profile_store_size)
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    if not settings.admin_token or not token:
+        return False
+    return hmac.compare_digest(token, settings.admin_token)
+
+
+def _parse_routes(value: str) -> Set[Tuple[str, str]]:
+    routes = set()
+    for part in value.split(","):
+        method, _, path = part.strip().partition(" ")
+        if method and path.strip():
+            routes.add((method.upper(), path.strip()))
+    return routes
+
+
+_sample_routes = _parse_routes(settings.profile_sample_routes)
+
+
+def _format_stats(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(settings.profile_top_functions)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected requests and stores the result"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _select(self, scope):
+        headers = dict(scope.get("headers") or [])
+        requested = headers.get(b"x-profile")
+        if requested is not None:
+            token = headers.get(b"x-admin-token", b"").decode("latin-1")
+            if is_admin_token(token):
+                mode = requested.decode("latin-1").strip().lower()
+                return ("cprofile" if mode == "cprofile" else "trace"), "header"
+        # Sample only real work, not load balancer probes or metrics scrapes
+        if (
+            settings.profile_sample_rate > 0
+            and (scope["method"], scope["path"]) in _sample_routes
+            and random.random() < settings.profile_sample_rate
+        ):
+            return "trace", "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        selected = self._select(scope)
+        if selected is None:
+            await self.app(scope, receive, send)
+            return
+
+        global _cprofile_active
+        mode, trigger = selected
+        profiler = None
+        if mode == "cprofile":
+            if _cprofile_active:
+                # Only one cProfile can run per thread; degrade to a trace
+                mode = "trace"
+            else:
+                profiler = cProfile.Profile()
+                _cprofile_active = True
+
+        profile = RequestProfile(scope["method"], scope["path"], mode, trigger)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                if trigger == "header":
+                    # Sampled callers are not admins; keep the profile id to ourselves
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        if profiler is not None:
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _cprofile_active = False
+                profile.cprofile = _format_stats(profiler)
+            _current_profile.reset(token)
+            profile.finish()
+            profile_store.add(profile)
@@ -0,0 +1,166 @@
+"""
+Grading prompt assembly.
+
+Everything that is the same for every student answer to a question (system
+message, instructions, rubric, question, reference answer, output format)
+forms a static prefix. It is compiled once per (question, row version,
+rubric version) and cached. Per-answer fields (similarity, confidence,
+student answer) are appended at the tail so provider-side prompt-prefix
+caching can reuse the prefix across students.
+"""
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings, GENERAL_RUBRIC, CATEGORY_RUBRICS
+
+SYSTEM_MESSAGE = "You are an expert grader. Always return valid JSON only."
+
+
+def content_version(*parts: str) -> str:
+    """Short stable hash identifying a version of some prompt content"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def resolve_rubric(category: Optional[str]) -> str:
+    """Rubric for a question category, falling back to the general rubric"""
+    return CATEGORY_RUBRICS.get(category, GENERAL_RUBRIC)
+
+
+# Hashed once at import; lookups reuse the rubric string's cached hash
+RUBRIC_VERSIONS: Dict[str, str] = {
+    rubric: content_version(rubric) for rubric in [GENERAL_RUBRIC, *CATEGORY_RUBRICS.values()]
+}
+
+
+def rubric_version(rubric: str) -> str:
+    version = RUBRIC_VERSIONS.get(rubric)
+    return version if version is not None else content_version(rubric)
+
+
+@dataclass(frozen=True)
+class CompiledPrefix:
+    key: Tuple[Any, str, str]
+    text: str
+
+
+def compile_prefix(rubric: str, question: str, ref_answer: str) -> str:
+    return f"""You are an experienced examiner. You will grade a student's answer using the rubric AND the similarity score.
+
+Rules:
+- If similarity < 0.50 → heavily penalize understanding and key points
+- If similarity 0.50–0.70 → apply moderate penalty
+- If similarity > 0.70 → grade normally
+- Do NOT reward unrelated or incorrect answers
+
+Rubric:
+{rubric}
+
+Question:
+{question}
+
+Reference Answer:
+{ref_answer}
+
+Return a JSON object ONLY:
+{{
+  "understanding": number,
+  "key_points": number,
+  "structure": number,
+  "accuracy": number,
+  "final_score": number,
+  "feedback": "string",
+  "isCorrect": boolean
+}}
+
+IMPORTANT: The "isCorrect" field must be included and should reflect whether the answer is factually/conceptually correct based on your evaluation, regardless of the final_score. For example:
+- If the answer is numerically or factually correct but lacks explanation/format, set isCorrect: true
+- If the answer is wrong or unrelated, set isCorrect: false
+- Base isCorrect on the correctness of the answer itself, not on the scoring criteria like structure or completeness
+"""
+
+
+class PromptCache:
+    """LRU cache of compiled prompt prefixes, plus provider cache usage counters"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._prefixes: "OrderedDict[Tuple[Any, str, str], CompiledPrefix]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self.completions = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def prefix(
+        self,
+        question_id: Optional[int],
+        question_version: Optional[str],
+        rubric: str,
+        question: str,
+        ref_answer: str,
+    ) -> CompiledPrefix:
+        # The question's row version changes on every edit, so id + version
+        # identify the content without hashing it; otherwise hash the content
+        if question_id is not None and question_version is not None:
+            key = (question_id, question_version, rubric_version(rubric))
+        else:
+            key = (None, content_version(question, ref_answer), rubric_version(rubric))
+        compiled = self._prefixes.get(key)
+        if compiled is not None:
+            self.hits += 1
+            self._prefixes.move_to_end(key)
+            return compiled
+
+        self.misses += 1
+        compiled = CompiledPrefix(key=key, text=compile_prefix(rubric, question, ref_answer))
+        self._prefixes[key] = compiled
+        while len(self._prefixes) > self.max_size:
+            self._prefixes.popitem(last=False)
+        return compiled
+
+    def record_usage(self, usage):
+        """Track prompt tokens the provider served from its prefix cache"""
+        if usage is None:
+            return
+        self.completions += 1
+        self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.cached_tokens += getattr(details, "cached_tokens", 0) or 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "compiled_prefixes": len(self._prefixes),
+            "prefix_hits": self.hits,
+            "prefix_misses": self.misses,
+            "completions": self.completions,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_tokens,
+            "cached_token_ratio": round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else None,
+        }
+
+
+prompt_cache = PromptCache(settings.prompt_cache_size)
+
+
+def build_messages(prefix: CompiledPrefix, similarity: float, student_answer: str) -> List[Dict[str, str]]:
+    """Chat messages for one answer: cached static prefix first, per-answer fields last"""
+    # Calculate confidence score for prompt
+    confidence_score = min(similarity * 100, 100)
+    tail = f"""
+Similarity Score: {similarity:.2f}
+Confidence Score: {confidence_score:.2f}
+
+Student Answer:
+{student_answer}
+"""
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prefix.text + tail},
+    ]
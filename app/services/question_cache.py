@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import literal_column, select, text
+
+from app.config import settings
+from app.db import AsyncSessionLocal
+from app.models.question import Question
+from app.services.similarity import list_to_array
+
+
+@dataclass(frozen=True)
+class CachedQuestion:
+    """Grading-ready view of a question, with the embedding already a NumPy array"""
+    id: int
+    text: str
+    reference_answer: str
+    category: str
+    embedding: Optional[np.ndarray]
+    # Row version (xmin) the entry was loaded at
+    version: str
+
+    @classmethod
+    def from_model(cls, question: Question, version: str) -> "CachedQuestion":
+        embedding = list_to_array(list(question.embedding)) if question.embedding is not None else None
+        return cls(
+            id=question.id,
+            text=question.text,
+            reference_answer=question.reference_answer,
+            category=question.category,
+            embedding=embedding,
+            version=version,
+        )
+
+
+# Row version: Postgres changes a row's xmin on every update
+ROW_VERSION = literal_column("questions.xmin::text")
+
+
+class QuestionCache:
+    """
+    Per-worker LRU cache of questions used by grading.
+
+    Every hit is checked against the row's current version with a primary-key
+    lookup that returns no question data, so edits and deletes made through
+    any worker are seen on the next request. A deleted question is reported
+    as missing before any embedding or LLM work is done.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, CachedQuestion]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def _put(self, question: CachedQuestion):
+        self._entries[question.id] = question
+        self._entries.move_to_end(question.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, question_id: int) -> Optional[CachedQuestion]:
+        cached = self._entries.get(question_id)
+        async with AsyncSessionLocal() as db:
+            if cached is not None:
+                result = await db.execute(select(ROW_VERSION).where(Question.id == question_id))
+                version = result.scalar_one_or_none()
+                if version == cached.version:
+                    self.hits += 1
+                    self._entries.move_to_end(question_id)
+                    return cached
+                self.stale += 1
+                if version is None:
+                    # Deleted through another worker
+                    self._entries.pop(question_id, None)
+                    return None
+
+            self.misses += 1
+            result = await db.execute(select(Question, ROW_VERSION).where(Question.id == question_id))
+            row = result.one_or_none()
+
+        if row is None:
+            self._entries.pop(question_id, None)
+            return None
+        question, version = row
+        cached = CachedQuestion.from_model(question, version)
+        self._put(cached)
+        return cached
+
+    def invalidate(self, question_id: int):
+        self._entries.pop(question_id, None)
+
+    async def preload(self, limit: int, days: int = 7) -> List[CachedQuestion]:
+        """Load the questions with the most answers in the last `days` days"""
+        async with AsyncSessionLocal() as db:
+            hot = await db.execute(
+                text("""
+                    SELECT question_id FROM answers
+                    WHERE created_at >= now() - make_interval(days => :days)
+                    GROUP BY question_id
+                    ORDER BY count(*) DESC
+                    LIMIT :limit
+                """),
+                {"days": days, "limit": limit},
+            )
+            question_ids = [row[0] for row in hot]
+            if not question_ids:
+                return []
+            result = await db.execute(
+                select(Question, ROW_VERSION).where(Question.id.in_(question_ids))
+            )
+            rows = result.all()
+
+        loaded = []
+        for question, version in rows:
+            cached = CachedQuestion.from_model(question, version)
+            self._put(cached)
+            loaded.append(cached)
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+        }
+
+
+question_cache = QuestionCache(settings.question_cache_size)
@@ -0,0 +1,95 @@
+import numpy as np
+from typing import Dict, Any, Tuple
+
+from app.services.grader import AUTO_FAIL_RESULT, SCORE_KEYS, PenaltyPolicy
+
+FINAL = SCORE_KEYS.index("final_score")
+AUTO_FAIL_SCORES = np.array([AUTO_FAIL_RESULT[key] for key in SCORE_KEYS], dtype=np.float64)
+
+
+def rescore(
+    similarity: np.ndarray,
+    raw_scores: np.ndarray,
+    has_raw: np.ndarray,
+    policy: PenaltyPolicy,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized apply_penalty_policy over many stored answers.
+
+    raw_scores is an (n, 5) array in SCORE_KEYS order holding the raw LLM
+    scores; missing criteria are NaN and stay NaN. has_raw marks rows that
+    have a raw evaluation at all.
+
+    Returns (scores, auto_fail, scorable):
+    - scores: (n, 5) new integer-valued scores (NaN where a criterion is missing)
+    - auto_fail: rows that now auto-fail
+    - scorable: rows with a defined result under the new policy. Rows that
+      auto-failed under the old policy have no raw scores and cannot be
+      re-scored unless they still auto-fail.
+    """
+    similarity = np.asarray(similarity, dtype=np.float64)
+    raw_scores = np.asarray(raw_scores, dtype=np.float64)
+    has_raw = np.asarray(has_raw, dtype=bool)
+
+    auto_fail = similarity < policy.fail_below
+    in_band = ~auto_fail & (similarity < policy.full_credit_from)
+    scorable = auto_fail | has_raw
+
+    raw_final = np.nan_to_num(raw_scores[:, FINAL], nan=0.0)
+    band = policy.full_credit_from - policy.fail_below
+    penalty = np.where(
+        in_band, (policy.full_credit_from - similarity) / band * policy.max_penalty, 0.0
+    )
+
+    final = np.where(in_band, np.maximum(0.0, raw_final - penalty), raw_final)
+    final = np.trunc(np.clip(np.trunc(final), 0, 100))
+
+    criteria = np.delete(raw_scores, FINAL, axis=1)
+    adjust = in_band & (raw_final > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(adjust, penalty / raw_final, 0.0)
+    factor = (1 - ratio * policy.criteria_factor)[:, None]
+    # int() truncates toward zero, and max(0, ...) only matters for adjusted rows
+    criteria = np.where(
+        adjust[:, None], np.maximum(0.0, np.trunc(criteria * factor)), np.trunc(criteria)
+    )
+
+    scores = np.insert(criteria, FINAL, final, axis=1)
+    scores[auto_fail] = AUTO_FAIL_SCORES
+    return scores, auto_fail, scorable
+
+
+def distribution(final_scores: np.ndarray) -> Dict[str, Any]:
+    """Summary statistics and a 10-point histogram for a set of final scores"""
+    final_scores = np.asarray(final_scores, dtype=np.float64)
+    if final_scores.size == 0:
+        return {"count": 0}
+
+    counts, _ = np.histogram(final_scores, bins=np.arange(0, 101, 10))
+    p10, p50, p90 = np.percentile(final_scores, [10, 50, 90])
+    return {
+        "count": int(final_scores.size),
+        "mean": round(float(final_scores.mean()), 2),
+        "p10": float(p10),
+        "median": float(p50),
+        "p90": float(p90),
+        "histogram": {f"{low}-{low + 9 if low < 90 else 100}": int(c) for low, c in zip(range(0, 100, 10), counts)},
+    }
+
+
+def compare(old_final: np.ndarray, new_final: np.ndarray) -> Dict[str, Any]:
+    """What-if report: old vs new distribution and per-answer deltas"""
+    old_final = np.asarray(old_final, dtype=np.float64)
+    new_final = np.asarray(new_final, dtype=np.float64)
+    delta = new_final - old_final
+    changed = delta != 0
+    return {
+        "old": distribution(old_final),
+        "new": distribution(new_final),
+        "changed": int(changed.sum()),
+        "raised": int((delta > 0).sum()),
+        "lowered": int((delta < 0).sum()),
+        "mean_delta": round(float(delta.mean()), 2) if delta.size else 0.0,
+        "max_raise": float(delta.max()) if delta.size else 0.0,
+        "max_drop": float(delta.min()) if delta.size else 0.0,
+    }
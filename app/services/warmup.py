@@ -0,0 +1,152 @@
+"""
+Worker warm start and readiness.
+
+`warm_up()` runs at startup after the schema check. It pre-opens database
+pool connections and outbound OpenAI connections, and preloads hot questions
+together with their compiled prompt prefixes, so the first students hitting a
+fresh worker do not pay for it. Each step is bounded by `warmup_timeout` so a
+dead dependency cannot hold up startup (and with it the liveness probe);
+failed steps are retried in the background by `retry_warm_up()`.
+`check_readiness()` backs the `/ready` endpoint: a worker is ready once every
+warm-up step has succeeded and its dependencies answer within `ready_timeout`.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.db import engine
+from app.services import embeddings, grader
+from app.services.prompts import prompt_cache, resolve_rubric
+from app.services.question_cache import question_cache
+
+
+# Cheap authenticated request used to open connections and probe the API
+READY_PROBE_MODEL = "gpt-4"
+
+
+class Readiness:
+    def __init__(self):
+        self.warm = False
+        self.warmup_ms: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        # Last OpenAI probe: (monotonic time, result)
+        self._openai_probe: Optional[Tuple[float, Dict[str, Any]]] = None
+
+
+readiness = Readiness()
+
+
+async def _timed(awaitable: Awaitable, timeout: Optional[float] = None) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        detail = await asyncio.wait_for(awaitable, timeout)
+    except Exception as e:
+        return {
+            "ok": False,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "error": f"{type(e).__name__}: {e}",
+        }
+    result = {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+    if detail is not None:
+        result["detail"] = detail
+    return result
+
+
+async def _open_db_connections(count: int) -> int:
+    """Hold `count` connections at once so the pool really opens that many"""
+    connections = []
+    try:
+        for _ in range(count):
+            conn = await engine.connect()
+            connections.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            await conn.close()
+    return len(connections)
+
+
+async def _open_openai_connections(count: int) -> int:
+    """Concurrent cheap requests so each client's HTTP pool opens `count` TLS connections"""
+    clients = [embeddings.client, grader.client]
+    await asyncio.gather(*(
+        client.models.retrieve(READY_PROBE_MODEL) for client in clients for _ in range(count)
+    ))
+    return count * len(clients)
+
+
+async def _preload_questions(limit: int) -> int:
+    questions = await question_cache.preload(limit)
+    for question in questions:
+        prompt_cache.prefix(
+            question.id, question.version, resolve_rubric(question.category),
+            question.text, question.reference_answer,
+        )
+    return len(questions)
+
+
+WARMUP_STEPS: Dict[str, Callable[[], Awaitable[Any]]] = {
+    "db_connections": lambda: _open_db_connections(settings.warm_db_connections),
+    "openai_connections": lambda: _open_openai_connections(settings.warm_openai_connections),
+    "questions": lambda: _preload_questions(settings.warm_questions),
+}
+
+
+async def warm_up():
+    """
+    Run every warm-up step that has not succeeded yet; failures are recorded,
+    not raised. The worker counts as warm only once all steps have succeeded.
+    """
+    started = time.perf_counter()
+    for name, step in WARMUP_STEPS.items():
+        if readiness.steps.get(name, {}).get("ok"):
+            continue
+        readiness.steps[name] = await _timed(step(), settings.warmup_timeout)
+    readiness.warmup_ms = round((time.perf_counter() - started) * 1000, 1)
+    readiness.warm = all(readiness.steps[name]["ok"] for name in WARMUP_STEPS)
+
+
+async def retry_warm_up(interval: float):
+    """Retry failed warm-up steps until the worker is warm"""
+    while not readiness.warm:
+        await asyncio.sleep(interval)
+        await warm_up()
+
+
+async def _probe_openai() -> Dict[str, Any]:
+    # Cached so load balancer probes do not turn into a stream of API calls
+    now = time.monotonic()
+    cached = readiness._openai_probe
+    if cached is not None and now - cached[0] < settings.ready_openai_ttl:
+        return {**cached[1], "cached": True}
+    async def retrieve_model():
+        await grader.client.models.retrieve(READY_PROBE_MODEL)
+
+    result = await _timed(retrieve_model(), settings.ready_timeout)
+    readiness._openai_probe = (now, result)
+    return result
+
+
+async def _probe_db() -> Dict[str, Any]:
+    async def select_one():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    return await _timed(select_one(), settings.ready_timeout)
+
+
+async def check_readiness() -> Tuple[bool, Dict[str, Any]]:
+    """Return (ready, report) with live dependency latencies"""
+    database, openai = await asyncio.gather(_probe_db(), _probe_openai())
+    ready = readiness.warm and database["ok"] and openai["ok"]
+    return ready, {
+        "status": "ready" if ready else "not_ready",
+        "warm": readiness.warm,
+        "warmup_ms": readiness.warmup_ms,
+        "warmup_steps": readiness.steps,
+        "dependencies": {"database": database, "openai": openai},
+        "db_pool": engine.pool.status(),
+    }
@@ -0,0 +1,151 @@
+"""
+Archive old answers to compressed JSON Lines files.
+
+Rows older than the cutoff are written to gzip files under --out-dir, then
+either have their embeddings dropped in place (scores stay queryable) or are
+removed from the database entirely.
+
+With monthly (time) partitioning whole partitions are archived and, in
+"move" mode, detached and dropped. With hash partitioning rows are selected
+by created_at within each partition.
+
+Usage:
+    python scripts/archive_answers.py --older-than-months 12 --mode strip-embeddings
+    python scripts/archive_answers.py --older-than-months 24 --mode move
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import re
+import sys
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import column, select, table, text, update, delete
+
+from app.db import engine
+from app.migrations import answers_partition_strategy, add_months, ensure_answer_partitions
+from app.models.answer import Answer
+
+PARTITION_NAME = re.compile(r"^answers_y(\d{4})m(\d{2})$")
+
+
+def partition_table(name: str):
+    """Lightweight table clause for one partition with the Answer column types"""
+    return table(name, *[column(c.name, c.type) for c in Answer.__table__.columns])
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+async def list_partitions(conn):
+    result = await conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('answers')
+        ORDER BY c.relname
+    """))
+    return [row[0] for row in result]
+
+
+async def export_rows(conn, part, where, out_path: Path) -> int:
+    """Stream matching rows into a gzip JSON Lines file"""
+    count = 0
+    result = await conn.stream(select(part).where(*where))
+    with gzip.open(out_path, "wt", encoding="utf-8") as f:
+        async for row in result:
+            f.write(json.dumps(dict(row._mapping), default=_json_default) + "\n")
+            count += 1
+    return count
+
+
+async def archive_partition(name: str, where, mode: str, out_dir: Path, detach: bool, dry_run: bool):
+    part = partition_table(name)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    out_path = out_dir / f"{name}-{stamp}.jsonl.gz"
+
+    if mode == "strip-embeddings":
+        where = [*where, part.c.embedding.isnot(None)]
+
+    # Export and modify in one transaction so rows are never lost in between
+    async with engine.begin() as conn:
+        pending = await conn.execute(select(text("1")).select_from(part).where(*where).limit(1))
+        if pending.first() is None:
+            print(f"{name}: nothing to archive")
+            return
+
+        if dry_run:
+            print(f"{name}: would archive to {out_path} ({mode})")
+            return
+
+        count = await export_rows(conn, part, where, out_path)
+        if mode == "strip-embeddings":
+            await conn.execute(update(part).where(*where).values(embedding=None))
+        elif detach:
+            await conn.execute(text(f"ALTER TABLE answers DETACH PARTITION {name}"))
+            await conn.execute(text(f"DROP TABLE {name}"))
+        else:
+            await conn.execute(delete(part).where(*where))
+
+        print(f"{name}: archived {count} rows to {out_path} ({mode})")
+
+
+async def archive_answers(older_than_months: int, mode: str, out_dir: Path, dry_run: bool):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cutoff_month = add_months(date.today().replace(day=1), -older_than_months)
+    cutoff = datetime(cutoff_month.year, cutoff_month.month, 1, tzinfo=timezone.utc)
+    print(f"Archiving answers created before {cutoff.date()} (mode: {mode})")
+
+    # Also rolls partitions forward and splits stray rows out of answers_default,
+    # so whole months can be archived at the partition level
+    async with engine.begin() as conn:
+        if not dry_run:
+            await ensure_answer_partitions(conn)
+        strategy = await answers_partition_strategy(conn)
+        partitions = await list_partitions(conn)
+
+    if strategy is None:
+        print("Error: answers table is not partitioned; run init_db migrations first.")
+        return
+
+    for name in partitions:
+        if strategy == "time":
+            match = PARTITION_NAME.match(name)
+            if match:
+                month = date(int(match.group(1)), int(match.group(2)), 1)
+                if add_months(month, 1) > cutoff_month:
+                    continue
+                # Whole partition is older than the cutoff
+                await archive_partition(name, [], mode, out_dir, detach=True, dry_run=dry_run)
+                continue
+            # Default partition: archive by row
+        part = partition_table(name)
+        await archive_partition(
+            name, [part.c.created_at < cutoff], mode, out_dir, detach=False, dry_run=dry_run
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old answers to compressed files")
+    parser.add_argument("--older-than-months", type=int, default=12)
+    parser.add_argument(
+        "--mode",
+        choices=["strip-embeddings", "move"],
+        default="strip-embeddings",
+        help="strip-embeddings keeps rows and scores but drops vectors; move removes rows",
+    )
+    parser.add_argument("--out-dir", type=Path, default=Path("archive"))
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(archive_answers(args.older_than_months, args.mode, args.out_dir, args.dry_run))
@@ -0,0 +1,84 @@
+"""
+Benchmark answer insert throughput: per-request add/commit/refresh versus
+the batched write-behind path. Inserted rows are deleted afterwards.
+
+Usage:
+    python scripts/bench_answer_writes.py --question-id 1 --rows 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete
+
+from app.db import AsyncSessionLocal, engine
+from app.models.answer import Answer
+from app.services.answer_writer import AnswerBatchWriter
+
+BENCH_ANSWER = "__bench_answer_writes__"
+
+
+def sample_values(question_id: int):
+    return dict(
+        question_id=question_id,
+        student_answer=BENCH_ANSWER,
+        embedding=[0.0] * 1536,
+        similarity=0.5,
+        final_score=50,
+        evaluation={"final_score": 50},
+        raw_evaluation={"final_score": 50},
+    )
+
+
+async def insert_per_row(question_id: int):
+    async with AsyncSessionLocal() as db:
+        answer = Answer(**sample_values(question_id))
+        db.add(answer)
+        await db.commit()
+        await db.refresh(answer)
+        return answer.id
+
+
+async def run(label: str, insert_one, question_id: int, rows: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker():
+        async with semaphore:
+            await insert_one(question_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(rows)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {rows} rows in {elapsed:.2f}s -> {rows / elapsed:.1f} rows/s")
+
+
+async def bench(question_id: int, rows: int, concurrency: int, batch_size: int, batch_ms: float):
+    await run("per-row", insert_per_row, question_id, rows, concurrency)
+
+    writer = AnswerBatchWriter(max_batch=batch_size, max_wait_ms=batch_ms)
+    await writer.start()
+    await run("batched", lambda qid: writer.insert(sample_values(qid)), question_id, rows, concurrency)
+    await writer.stop()
+    print(f"Batch writer stats: {writer.stats()}")
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Answer).where(Answer.student_answer == BENCH_ANSWER))
+        await db.commit()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark answer insert throughput")
+    parser.add_argument("--question-id", type=int, required=True)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batch-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    asyncio.run(bench(args.question_id, args.rows, args.concurrency, args.batch_size, args.batch_ms))
@@ -0,0 +1,85 @@
+"""
+Regrade answers left ungraded by the fast path because the LLM call missed
+its deadline (evaluation.pending_regrade = true). Run it after LLM slowdowns
+or on a schedule; nothing regrades these answers automatically.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+
+from app.db import AsyncSessionLocal
+from app.models.answer import Answer
+from app.models.question import Question
+from app.services.grader import evaluate_answer
+from app.services.prompts import resolve_rubric
+from app.services.question_cache import ROW_VERSION
+
+
+async def regrade_pending():
+    """Re-run the LLM evaluation for every answer still pending a regrade"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(
+                Answer.id, Answer.similarity, Answer.student_answer,
+                Question.id, Question.text, Question.reference_answer, Question.category,
+                ROW_VERSION,
+            )
+            .join(Question, Question.id == Answer.question_id)
+            .where(Answer.evaluation["pending_regrade"].as_boolean().is_(True))
+            .order_by(Answer.id)
+        )
+        pending = result.all()
+
+    print(f"Found {len(pending)} answers pending regrade")
+    regraded_count = 0
+    still_pending_count = 0
+    error_count = 0
+
+    for idx, row in enumerate(pending, start=1):
+        (answer_id, similarity, student_answer,
+         question_id, question_text, ref_answer, category, question_version) = row
+        try:
+            evaluation, raw_evaluation = await evaluate_answer(
+                similarity=similarity,
+                rubric=resolve_rubric(category),
+                question=question_text,
+                ref_answer=ref_answer,
+                student_answer=student_answer,
+                question_id=question_id,
+                question_version=question_version,
+            )
+        except Exception as e:
+            error_count += 1
+            print(f"[{idx}/{len(pending)}] Error regrading answer {answer_id}: {str(e)}")
+            continue
+
+        if evaluation.get("pending_regrade"):
+            # Timed out again; leave it pending
+            still_pending_count += 1
+            continue
+
+        async with AsyncSessionLocal() as db:
+            answer = await db.get(Answer, answer_id)
+            if answer is None:
+                continue
+            answer.evaluation = evaluation
+            answer.raw_evaluation = raw_evaluation
+            answer.final_score = evaluation.get("final_score", 0)
+            await db.commit()
+        regraded_count += 1
+
+    print("\n" + "="*50)
+    print("Regrade completed!")
+    print(f"Regraded: {regraded_count}")
+    print(f"Still pending: {still_pending_count}")
+    print(f"Errors: {error_count}")
+    print("="*50)
+
+
+if __name__ == "__main__":
+    asyncio.run(regrade_pending())
@@ -0,0 +1,169 @@
+"""
+Re-score stored answers under a new penalty policy without any LLM calls.
+
+Uses the raw (pre-penalty) LLM evaluation stored with each answer and the
+vectorized engine in app.services.rescoring. By default this is a dry run
+that prints how the score distribution would shift; pass --apply to write
+the new scores.
+
+Usage:
+    python scripts/rescore_answers.py --max-penalty 30 --full-credit-from 0.55
+    python scripts/rescore_answers.py --max-penalty 30 --full-credit-from 0.55 --apply
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from sqlalchemy import text
+
+from app.db import engine
+from app.services.grader import AUTO_FAIL_RESULT, DEFAULT_POLICY, SCORE_KEYS, PenaltyPolicy
+from app.services.rescoring import compare, rescore
+
+SELECT_CHUNK = text(f"""
+    SELECT id, question_id, created_at, similarity,
+           COALESCE(json_typeof(raw_evaluation) = 'object', false) AS has_raw,
+           {", ".join(f"CAST(evaluation->>'{key}' AS double precision)" for key in SCORE_KEYS)},
+           {", ".join(f"CAST(raw_evaluation->>'{key}' AS double precision)" for key in SCORE_KEYS)}
+    FROM answers
+    WHERE id > :last_id AND similarity IS NOT NULL
+      -- Ungraded deadline fallbacks belong to scripts/regrade_pending.py
+      AND (evaluation->>'pending_regrade') IS DISTINCT FROM 'true'
+      AND (CAST(:question_id AS integer) IS NULL OR question_id = :question_id)
+    ORDER BY id
+    LIMIT :limit
+""")
+
+# One statement per chunk; matching on the partition keys lets Postgres prune
+UPDATE_CHUNK = text("""
+    UPDATE answers AS a
+    SET final_score = v.final_score,
+        evaluation = CASE
+            WHEN v.auto_fail THEN CAST(:auto_fail_result AS json)
+            ELSE (CAST(a.raw_evaluation AS jsonb) || jsonb_strip_nulls(jsonb_build_object(
+                'understanding', v.understanding,
+                'key_points', v.key_points,
+                'structure', v.structure,
+                'accuracy', v.accuracy,
+                'final_score', v.final_score
+            )))::json
+        END
+    FROM unnest(
+        CAST(:ids AS integer[]),
+        CAST(:question_ids AS integer[]),
+        CAST(:created_ats AS timestamptz[]),
+        CAST(:understanding AS integer[]),
+        CAST(:key_points AS integer[]),
+        CAST(:structure AS integer[]),
+        CAST(:accuracy AS integer[]),
+        CAST(:final_score AS integer[]),
+        CAST(:auto_fail AS boolean[])
+    ) AS v(id, question_id, created_at, understanding, key_points, structure, accuracy,
+           final_score, auto_fail)
+    WHERE a.id = v.id AND a.question_id = v.question_id AND a.created_at = v.created_at
+""")
+
+
+def _int_list(values: np.ndarray):
+    return [None if np.isnan(value) else int(value) for value in values]
+
+
+async def rescore_answers(policy: PenaltyPolicy, question_id, chunk_size: int, apply: bool):
+    print(f"Policy: {policy}")
+    print("Mode: apply" if apply else "Mode: dry run (pass --apply to write)")
+
+    n_keys = len(SCORE_KEYS)
+    old_finals, new_finals = [], []
+    total = unscorable = written = 0
+    load_s = compute_s = write_s = 0.0
+    last_id = 0
+
+    async with engine.connect() as conn:
+        while True:
+            started = time.perf_counter()
+            result = await conn.execute(
+                SELECT_CHUNK, {"last_id": last_id, "question_id": question_id, "limit": chunk_size}
+            )
+            rows = result.all()
+            load_s += time.perf_counter() - started
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            started = time.perf_counter()
+            ids = [row[0] for row in rows]
+            question_ids = [row[1] for row in rows]
+            created_ats = [row[2] for row in rows]
+            numeric = np.array([row[3:] for row in rows], dtype=np.float64)
+            similarity = numeric[:, 0]
+            has_raw = numeric[:, 1].astype(bool)
+            old_scores = numeric[:, 2:2 + n_keys]
+            raw_scores = numeric[:, 2 + n_keys:]
+
+            scores, auto_fail, scorable = rescore(similarity, raw_scores, has_raw, policy)
+            # NaN != NaN, so compare missing criteria explicitly
+            differs = ~((scores == old_scores) | (np.isnan(scores) & np.isnan(old_scores)))
+            changed = scorable & differs.any(axis=1)
+
+            total += len(rows)
+            unscorable += int((~scorable).sum())
+            final_index = SCORE_KEYS.index("final_score")
+            old_finals.append(old_scores[scorable, final_index])
+            new_finals.append(scores[scorable, final_index])
+            compute_s += time.perf_counter() - started
+
+            if apply and changed.any():
+                started = time.perf_counter()
+                idx = np.flatnonzero(changed)
+                params = {
+                    "ids": [ids[i] for i in idx],
+                    "question_ids": [question_ids[i] for i in idx],
+                    "created_ats": [created_ats[i] for i in idx],
+                    "auto_fail": auto_fail[idx].tolist(),
+                    "auto_fail_result": json.dumps(AUTO_FAIL_RESULT),
+                }
+                for column, key in enumerate(SCORE_KEYS):
+                    params[key] = _int_list(scores[idx, column])
+                await conn.execute(UPDATE_CHUNK, params)
+                await conn.commit()
+                written += len(idx)
+                write_s += time.perf_counter() - started
+
+    await engine.dispose()
+
+    report = compare(
+        np.concatenate(old_finals) if old_finals else np.empty(0),
+        np.concatenate(new_finals) if new_finals else np.empty(0),
+    )
+    print(json.dumps(report, indent=2))
+    print("=" * 50)
+    print(f"Answers scanned: {total}")
+    print(f"Unscorable (no raw evaluation, left unchanged): {unscorable}")
+    print(f"Written: {written}")
+    print(f"Load: {load_s:.2f}s  Compute: {compute_s:.2f}s  Write: {write_s:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score answers under a new penalty policy")
+    parser.add_argument("--max-penalty", type=float, default=DEFAULT_POLICY.max_penalty)
+    parser.add_argument("--fail-below", type=float, default=DEFAULT_POLICY.fail_below)
+    parser.add_argument("--full-credit-from", type=float, default=DEFAULT_POLICY.full_credit_from)
+    parser.add_argument("--criteria-factor", type=float, default=DEFAULT_POLICY.criteria_factor)
+    parser.add_argument("--question-id", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--apply", action="store_true", help="Write new scores (default: dry run)")
+    args = parser.parse_args()
+
+    policy = PenaltyPolicy(
+        max_penalty=args.max_penalty,
+        fail_below=args.fail_below,
+        full_credit_from=args.full_credit_from,
+        criteria_factor=args.criteria_factor,
+    )
+    asyncio.run(rescore_answers(policy, args.question_id, args.chunk_size, args.apply))
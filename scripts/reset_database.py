@@ -9,7 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy import text
-from app.db import engine, Base
+from app.db import engine, init_db
 from app.models.question import Question
 from app.models.answer import Answer
 
@@ -37,12 +37,12 @@ async def reset_database():
         """))
         
         print("All tables dropped successfully!")
-        
-        # Recreate all tables
-        print("Creating tables...")
-        await conn.run_sync(Base.metadata.create_all)
-        
-        print("Database reset completed successfully!")
+    
+    # Recreate all tables and apply migrations
+    print("Creating tables...")
+    await init_db()
+    
+    print("Database reset completed successfully!")
     
     await engine.dispose()
 